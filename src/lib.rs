@@ -119,30 +119,25 @@ impl Trsltx {
         }
     }
     pub fn read_file(&mut self) -> Result<(), String> {
-        let input_file = std::fs::read_to_string(&self.input_file_name)
+        let mut input_file = std::fs::read_to_string(&self.input_file_name)
             .map_err(|e| format!("Cannot read file: {:?}", e))?;
-        // replace \r characters by nothing (appear in Windows files...)
-        let input_file = input_file.replace('\r', "");
+        // remove \r characters (appear in Windows files...)
+        // in place, so that the whole file is not copied
+        input_file.retain(|c| c != '\r');
         //let input_file = input_file.replace("\\end{document}", "\\commandevide\n\\end{document}");
         //let input_file = input_file.replace("\\end{document}", "\\commandevide\n\\end{document}");
 
-        let mut input_file = input_file.split("\\begin{document}");
-        self.preamble = input_file
-            .next()
-            .ok_or("Error in extracting preamble.")?
-            .to_string();
-        let mut input_file = input_file
-            .next()
-            .ok_or("No \\begin{document} in the tex file.")?
-            .split("\\end{document}");
-        self.body = input_file
-            .next()
-            .ok_or("Error in extracting body.")?
-            .to_string();
-        self.afterword = input_file
-            .next()
-            .ok_or("No \\end{document} in the tex file.")?
-            .to_string();
+        // cut only at the first \begin{document} and at the first \end{document} after it
+        // a later \begin{document} stays in the body and the afterword is kept entirely
+        let (preamble, input_file) = input_file
+            .split_once("\\begin{document}")
+            .ok_or("No \\begin{document} in the tex file.")?;
+        let (body, afterword) = input_file
+            .split_once("\\end{document}")
+            .ok_or("No \\end{document} in the tex file.")?;
+        self.preamble = preamble.to_string();
+        self.body = body.to_string();
+        self.afterword = afterword.to_string();
         Ok(())
     }
 
@@ -163,8 +158,7 @@ impl Trsltx {
     /// pass the body to print_split a generate a latex string with
     /// the "%trsltx-split" markers
     pub fn generate_split_latex(&self, split_length: usize) -> String {
-        let body = self.body.clone();
-        let ltxparse = LtxNode::new(body.as_str());
+        let ltxparse = LtxNode::new(self.body.as_str());
         let body = ltxparse.print_split(0, String::new(), split_length);
         //trim body
         let body = body.trim();
@@ -180,7 +174,7 @@ impl Trsltx {
             + "\\begin{document}\n"
             + &body
             + "\n\\end{document}\n"
-            + &self.afterword.clone();
+            + &self.afterword;
 
         println!("code: {}", latex);
 
@@ -194,9 +188,8 @@ impl Trsltx {
     /// the chunks enclosed between "%trsltx-begin-ignore\n" and "%trsltx-end-ignore\n"
     /// are marked as Unchanged
     pub fn extract_chunks(&mut self) -> Result<(), String> {
-        let toscan = self.body.clone();
         // add %trsltx-split before each %trsltx-begin-ignore
-        let toscan = toscan.replace(
+        let toscan = self.body.replace(
             "%trsltx-begin-ignore",
             "%trsltx-split\n%trsltx-begin-ignore",
         );
@@ -205,7 +198,8 @@ impl Trsltx {
         // split the body into chunks
         let chunks = toscan.split("%trsltx-split\n");
         for chunk in chunks {
-            let cchunk = chunk.trim().replace("%trsltx-split\n", "");
+            // the split marker cannot remain in the chunk: no need to remove it again
+            let cchunk = chunk.trim();
             if cchunk.contains("%trsltx-begin-ignore") {
                 if !cchunk.contains("%trsltx-end-ignore") {
                     return Err("Unbalanced %trsltx-begin-ignore".to_string());
@@ -218,16 +212,6 @@ impl Trsltx {
             }
         }
 
-        let numchunks = self.chunks.len();
-
-        for i in 0..numchunks {
-            let (s, t) = self.chunks[i].clone();
-            if let ChunkType::Unchanged = t {
-                // s = s.replace("%trsltx-begin-ignore\n", "");
-                // s = s.replace("%trsltx-end-ignore\n", "");
-                self.chunks[i] = (s, ChunkType::Unchanged);
-            }
-        }
         // mark last chunk as Unchanged
         // if numchunks > 0 {
         //     let (s, _) = self.chunks[numchunks - 1].clone();
@@ -274,8 +258,13 @@ impl Trsltx {
                             // append the split message
                             // so that the translated file
                             // can be reused by trsltx
+                            // except right after an ignored region
                             if count > 1 {
-                                body_translated.push_str("\n%trsltx-split\n");
+                                if body_translated.ends_with("%trsltx-end-ignore") {
+                                    body_translated.push('\n');
+                                } else {
+                                    body_translated.push_str("\n%trsltx-split\n");
+                                }
                             }
                             body_translated.push_str(trs_chunk.as_str());
                         }
@@ -293,18 +282,14 @@ impl Trsltx {
                 }
             }
         }
-        // last cleaning:
-        // remove the %trsltx-split immediately following %trsltx-end-ignore
-        body_translated = body_translated.replace(
-            "%trsltx-end-ignore\n%trsltx-split\n",
-            "%trsltx-end-ignore\n",
-        );
         self.body_translated = body_translated;
     }
 
     pub fn write_file(&self) -> Result<(), String> {
-        let mut output_file = std::fs::File::create(&self.output_file_name)
+        let output_file = std::fs::File::create(&self.output_file_name)
             .map_err(|e| format!("Cannot create file: {:?}", e))?;
+        // buffered, to avoid one write system call per small part
+        let mut output_file = std::io::BufWriter::new(output_file);
         output_file
             .write_all(self.preamble.as_bytes())
             .map_err(|e| format!("Cannot write to file: {:?}", e))?;
@@ -328,6 +313,10 @@ impl Trsltx {
         output_file
             .write_all(self.afterword.as_bytes())
             .map_err(|e| format!("Cannot write to file: {:?}", e))?;
+        // flush explicitly: errors are ignored when the BufWriter is dropped
+        output_file
+            .flush()
+            .map_err(|e| format!("Cannot write to file: {:?}", e))?;
 
         Ok(())
     }
@@ -372,17 +361,20 @@ pub fn get_lang_name(lang: &str) -> Result<String, String> {
         ("ru", "Russian"),
     ];
 
-    // build a dictionnary from the list of languages
-    let mut lang_dict = std::collections::HashMap::new();
-    for (k, v) in LANGUAGES.iter() {
-        lang_dict.insert(k.to_string(), v.to_string());
-    }
-
-    let lang = lang_dict.get(lang).ok_or(
+    // direct lookup in the constant table: no dictionnary to build at each call
+    let (_, name) = LANGUAGES.iter().find(|(k, _)| *k == lang).ok_or(
         "The supported languages are: en,fr,es,de,it,pt,ru. Unsupported language: ".to_owned()
             + lang,
     )?;
-    Ok(lang.to_string())
+    Ok(name.to_string())
+}
+
+/// http client shared by all the requests to the textsynth server
+/// it is built only once, so that the TLS setup and the connection pool
+/// are reused from one chunk to the next
+fn ts_client() -> &'static reqwest::blocking::Client {
+    static CLIENT: std::sync::OnceLock<reqwest::blocking::Client> = std::sync::OnceLock::new();
+    CLIENT.get_or_init(reqwest::blocking::Client::new)
 }
 
 /// one chat operation with the textsynth LLM
@@ -413,8 +405,7 @@ fn chat_with_ts(question: &str) -> Result<String, String> {
         "max_tokens": max_tokens
     });
 
-    let client = reqwest::blocking::Client::new();
-    let res = client
+    let res = ts_client()
         .post(url)
         .header("Content-Type", "application/json")
         .header("Authorization", format!("Bearer {}", api_key))
@@ -439,6 +430,22 @@ fn chat_with_ts(question: &str) -> Result<String, String> {
     Ok(answer)
 }
 
+/// api key of the textsynth server, looked up only once
+/// get the api key from the file "api_key.txt"
+/// or if the file does not exist, from the environment variable "TEXTSYNTH_API_KEY"
+fn ts_api_key() -> Result<&'static str, String> {
+    static API_KEY: std::sync::OnceLock<Result<String, String>> = std::sync::OnceLock::new();
+    API_KEY
+        .get_or_init(|| match std::fs::read_to_string("api_key.txt") {
+            // if the file exists, get the api key from the file
+            // removing the spaces and newlines with trim()
+            Ok(api_key) => Ok(api_key.trim().to_string()),
+            Err(_) => std::env::var("TEXTSYNTH_API_KEY").map_err(|e| format!("You have to provide an api key in the file api_key.txt or by export TEXTSYNTH_API_KEY=api_key. Error: {:?}", e)),
+        })
+        .as_deref()
+        .map_err(|e| e.clone())
+}
+
 /// one completion operation with the textsynth LLM
 /// send the question and a formal grammar (as Some(String) or None)
 /// and returns an answer
@@ -447,14 +454,7 @@ fn complete_with_ts(
     grammar: &Option<String>,
     model: String,
 ) -> Result<String, String> {
-    // get the api key from the file "api_key.txt"
-    //or if the file does not exist, from the environment variable "TEXTSYNTH_API_KEY"
-    let api_key = match std::fs::read_to_string("api_key.txt") {
-        // if the file exists, get the api key from the file
-        // removing the spaces and newlines with trim()
-        Ok(api_key) => api_key.trim().to_string(),
-        Err(_) => std::env::var("TEXTSYNTH_API_KEY").map_err(|e| format!("You have to provide an api key in the file api_key.txt or by export TEXTSYNTH_API_KEY=api_key. Error: {:?}", e))?,
-    };
+    let api_key = ts_api_key()?;
 
     // call the textsynth REST API
     let url = match model.as_str() {
@@ -487,8 +487,7 @@ fn complete_with_ts(
     };
     //println!("Req= {:?}", req);
     println!("Translate with {}", model);
-    let client = reqwest::blocking::Client::new();
-    let res = client
+    let res = ts_client()
         .post(url)
         .header("Content-Type", "application/json")
         .header("Authorization", format!("Bearer {}", api_key))
@@ -556,12 +555,14 @@ fn translate_one_chunk(chunk: &str, input_lang: &str, output_lang: &str, model:
     let ast_chunk = LtxNode::new(chunk);
     //let cmds = ast_chunk.extracts_commands();
     //println!("{:?}", ast_chunk);
+    // the grammar is generated once, for the request and for the log
+    let ebnf = ast_chunk.to_ebnf();
     let grammar = match ast_chunk {
         LtxNode::Problem(_) => None,
-        _ => Some(ast_chunk.to_ebnf().trim().to_string()),
+        _ => Some(ebnf.trim().to_string()),
     };
     //ast_chunk.print();
-    println!("Grammar: {}", ast_chunk.to_ebnf());
+    println!("Grammar: {}", ebnf);
     let mut distmin = std::usize::MAX;
     let mut iter = 0;
     let mut trs_chunk = "".to_string();